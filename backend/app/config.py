@@ -24,6 +24,13 @@ class Settings(BaseSettings):
     
     CLAUDE_MODEL: str = "claude-sonnet-4-5-20250929"
     
+    # ===========================================
+    # Report Files
+    # ===========================================
+    PDF_DIRECT_IO: bool = False  # Write PDFs with O_DIRECT (Linux, bypasses page cache)
+    SAVE_RAW_DATA: bool = False  # Also save the raw BaZi data as data.json (debugging)
+    PDF_WORKER_PROCESSES: int = 0  # Render PDFs in N worker processes (0 = threads in the API process)
+    
     # ===========================================
     # Pydantic Configuration
     # ===========================================
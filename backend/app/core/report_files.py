@@ -0,0 +1,116 @@
+"""
+Report Static Files
+===================
+
+StaticFiles mount for the reports directory that also serves
+zstd-compressed report files (report.html.zst, data.json.zst).
+
+A request for /reports/{id[:2]}/{id}/report.html falls back to report.html.zst
+when the plain file doesn't exist:
+- Clients that accept zstd get the stored bytes as-is (Content-Encoding: zstd)
+- Everyone else gets the file decompressed on the fly
+Both carry ETag/Last-Modified from the .zst file and answer conditional
+requests with 304, like plain static files.
+
+Hidden paths (any component starting with '.', e.g. the .staging
+directory of reports still being written) are never served.
+
+Usage:
+    from app.core.report_files import ReportStaticFiles
+
+    app.mount("/reports", ReportStaticFiles(directory=reports_dir), name="reports")
+"""
+
+import stat
+from mimetypes import guess_type
+from pathlib import PurePath
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+
+def _accepts_zstd(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding value allows zstd
+
+    zstd is acceptable when listed with q > 0, or when unlisted and
+    "*" has q > 0 ("zstd;q=0" opts out explicitly).
+    """
+    wildcard = False
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name == "zstd":
+            return q > 0
+        if name == "*":
+            wildcard = q > 0
+    return wildcard
+
+
+def _decompress_file(path: str) -> bytes:
+    """Read and decompress a .zst file (frames are written with their content size)"""
+    import zstandard
+
+    with open(path, "rb") as f:
+        return zstandard.ZstdDecompressor().decompress(f.read())
+
+
+class ReportStaticFiles(StaticFiles):
+    """StaticFiles that transparently serves '<path>.zst' for missing '<path>'"""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if any(part.startswith(".") for part in PurePath(path).parts):
+            raise HTTPException(status_code=404)
+
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as exc:
+            if exc.status_code != 404:
+                raise
+
+        full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + ".zst")
+        if not (stat_result and stat.S_ISREG(stat_result.st_mode)):
+            raise HTTPException(status_code=404)
+
+        media_type = guess_type(path)[0] or "text/plain"
+
+        request_headers = Headers(scope=scope)
+
+        # FileResponse derives ETag/Last-Modified from the .zst file's stat
+        zstd_response = FileResponse(
+            full_path,
+            stat_result=stat_result,
+            media_type=media_type,
+            headers={"Content-Encoding": "zstd", "Vary": "Accept-Encoding"},
+        )
+
+        # Send the compressed bytes untouched when the client can decode zstd
+        accept_encoding = ",".join(request_headers.getlist("accept-encoding"))
+        if _accepts_zstd(accept_encoding):
+            if self.is_not_modified(zstd_response.headers, request_headers):
+                return NotModifiedResponse(zstd_response.headers)
+            return zstd_response
+
+        # The decompressed bytes are a different representation: same
+        # Last-Modified, but an ETag of their own
+        headers = Headers(headers={
+            "etag": zstd_response.headers["etag"][:-1] + '-identity"',
+            "last-modified": zstd_response.headers["last-modified"],
+            "vary": "Accept-Encoding",
+        })
+        if self.is_not_modified(headers, request_headers):
+            return NotModifiedResponse(headers)
+
+        body = await anyio.to_thread.run_sync(_decompress_file, full_path)
+        return Response(body, media_type=media_type, headers=dict(headers))
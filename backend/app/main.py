@@ -4,13 +4,12 @@ BaZi Report Generator - FastAPI Application
 
 Features:
 - Rate limiting with SlowAPI
-- Static file serving for reports
+- Static file serving for reports (zstd-compressed files served transparently)
 - CORS middleware
 """
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from slowapi.errors import RateLimitExceeded
 from pathlib import Path
@@ -19,6 +18,7 @@ import logging
 from app.config import settings
 from app.routers import reports
 from app.core.limiter import limiter  # Import shared limiter instance
+from app.core.report_files import ReportStaticFiles
 
 # ===========================================
 # Logging Setup
@@ -52,8 +52,8 @@ app = FastAPI(
     - **POST /api/generate-report**: Generate full report → HTML + PDF files
     - **POST /api/bazi-only**: Get raw BaZi calculations
     - **GET /api/health**: Health check
-    - **GET /reports/{id}/report.html**: View HTML report
-    - **GET /reports/{id}/report.pdf**: Download PDF report
+    - **GET /reports/{id[:2]}/{id}/report.html**: View HTML report
+    - **GET /reports/{id[:2]}/{id}/report.pdf**: Download PDF report
     """,
     version="2.1.0",
     docs_url="/docs",
@@ -95,8 +95,8 @@ app.add_middleware(
 reports_dir = Path(__file__).parent.parent / "reports"
 reports_dir.mkdir(parents=True, exist_ok=True)
 
-# Mount static file serving
-app.mount("/reports", StaticFiles(directory=str(reports_dir)), name="reports")
+# Mount static file serving (falls back to report.html.zst / data.json.zst)
+app.mount("/reports", ReportStaticFiles(directory=str(reports_dir)), name="reports")
 
 # ===========================================
 # Include Routers
@@ -140,6 +140,14 @@ async def startup_event():
     else:
         logger.warning("   ⚠️ MCP Server: Not reachable")
     
+    # Preload WeasyPrint and the PDF stylesheet
+    from app.services.report_generator import report_generator
+    try:
+        report_generator.warm_up()
+        logger.info("   ✅ PDF Renderer: Ready")
+    except Exception as e:
+        logger.warning(f"   ⚠️ PDF Renderer: Not available ({e})")
+    
     # Check Claude API key
     if settings.ANTHROPIC_API_KEY:
         logger.info("   ✅ Claude API: Key configured")
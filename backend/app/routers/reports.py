@@ -57,8 +57,8 @@ async def generate_report(data: ReportRequest, request: Request):
             "success": true,
             "report_id": "abc12345",
             "files": {
-                "html": "/reports/abc12345/report.html",
-                "pdf": "/reports/abc12345/report.pdf"
+                "html": "/reports/ab/abc12345/report.html",
+                "pdf": "/reports/ab/abc12345/report.pdf"
             },
             "bazi_summary": {...},
             "sections_verified": true
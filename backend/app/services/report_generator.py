@@ -8,29 +8,366 @@ Report Generator Service - File-Based HTML/PDF Generation
 2. Save HTML to local file
 3. Convert HTML to PDF with WeasyPrint
 4. Save PDF to local file
-5. Return file paths
+5. Move the finished report directory into place (atomic rename)
+6. Return file paths
 
 File Structure:
-    backend/reports/{uuid}/
-        ├── report.html
+    backend/reports/{id[:2]}/{id}/
+        ├── report.html.zst   (report.html when compression is off)
         ├── report.pdf
-        └── data.json (optional)
+        └── data.json.zst     (only with SAVE_RAW_DATA, data.json when compression is off)
+    backend/reports/.staging/   (reports being written, renamed into place when done;
+                                 never served, stale ones removed at startup)
 """
 
 import os
-import uuid
+import re
+import copy
+import mmap
+import secrets
+import shutil
 import json
+import tempfile
+import threading
+import time
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import cached_property, lru_cache, partial
+from html import unescape
+from typing import Any, Callable, Optional
 from pathlib import Path
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader
-import markdown
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, Template
 
-# WeasyPrint for PDF generation
-from weasyprint import HTML, CSS
+# orjson (Rust) encodes JSON straight to bytes; stdlib json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
 
 from app.config import settings
 
 
+# Heavenly Stems (天干) and their romanized names
+_STEMS = ('甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸')
+_STEM_NAMES = ('Jia', 'Yi', 'Bing', 'Ding', 'Wu', 'Ji', 'Geng', 'Xin', 'Ren', 'Gui')
+_STEM_IDX = {stem: i for i, stem in enumerate(_STEMS)}
+
+# Day Master -> element caption (stems come in yang/yin pairs per element)
+_ELEMENT_NAMES = ('Wood 木', 'Fire 火', 'Earth 土', 'Metal 金', 'Water 水')
+_DAY_MASTER_ELEMENT = {stem: _ELEMENT_NAMES[i // 2] for i, stem in enumerate(_STEMS)}
+
+# Earthly Branches (地支) and their zodiac animals
+_BRANCHES = ('子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥')
+_BRANCH_NAMES = (
+    'Rat', 'Ox', 'Tiger', 'Rabbit', 'Dragon', 'Snake',
+    'Horse', 'Goat', 'Monkey', 'Rooster', 'Dog', 'Pig'
+)
+_BRANCH_IDX = {branch: i for i, branch in enumerate(_BRANCHES)}
+
+# Template variable prefix -> pillar key in the BaZi data
+_PILLARS = (('year', '年柱'), ('month', '月柱'), ('day', '日柱'), ('hour', '时柱'))
+
+# Request gender -> display form
+_GENDER_CAP = {'male': 'Male', 'female': 'Female'}
+
+# Chinese element -> CSS class
+_ELEMENT_MAP = {
+    '木': 'wood',
+    '火': 'fire',
+    '土': 'earth',
+    '金': 'metal',
+    '水': 'water',
+}
+
+# Birth date in the BaZi data: "1993年9月28日" (groups 1-3), else "1993-09-28"
+# (groups 4-6). Used with match(): the lazy prefixes make a Chinese date
+# anywhere in the string win over an earlier ISO one.
+_BIRTH_RE = re.compile(r'.*?(\d+)年(\d+)月(\d+)日|.*?(\d{4})-(\d{2})-(\d{2})', re.DOTALL)
+
+# Where to insert the Five Elements diagram, tried in order. Each pattern is
+# also given as its lowercase literals, which it joins with lazy '.*?': on the
+# lowercased HTML, _find_literals() then returns the same match end without
+# the regex. `exact` is False where the regex needs more (Pattern 6's \s*),
+# and the literals only rule out hopeless matches.
+_WUXING_PATTERNS = tuple(
+    (re.compile(pattern, re.IGNORECASE | re.DOTALL), literals, exact)
+    for pattern, literals, exact in (
+        # Pattern 1: After paragraph containing "Controlling Cycle" WITH inner tags allowed
+        (r'(<p>.*?Controlling Cycle.*?相剋.*?</p>)', ('<p>', 'controlling cycle', '相剋', '</p>'), True),
+        # Pattern 2: After paragraph containing "相剋" (Chinese for controlling)
+        (r'(<p>.*?相剋.*?</p>)', ('<p>', '相剋', '</p>'), True),
+        # Pattern 3: After paragraph containing both cycle types
+        (r'(<p>.*?Generating Cycle.*?Controlling Cycle.*?</p>)',
+         ('<p>', 'generating cycle', 'controlling cycle', '</p>'), True),
+        # Pattern 4: After any paragraph containing "Generating Cycle"
+        (r'(<p>.*?Generating Cycle.*?</p>)', ('<p>', 'generating cycle', '</p>'), True),
+        # Pattern 5: After paragraph mentioning Wu Xing
+        (r'(<p>.*?Wu Xing.*?</p>)', ('<p>', 'wu xing', '</p>'), True),
+        # Pattern 6: After h3 containing "Wu Xing" followed by first paragraph
+        (r'(<h3>.*?Wu Xing.*?</h3>\s*<p>.*?</p>)', ('<h3>', 'wu xing', '</h3>', '<p>', '</p>'), False),
+        # Pattern 7: After any mention of Five Elements with closing tag
+        # (the optional 's' can't be the start of '</p>', so it doesn't move the end)
+        (r'(<p>.*?Five Elements?.*?</p>)', ('<p>', 'five element', '</p>'), True),
+        # Pattern 8: After h3 containing "INTRODUCTION" followed by content
+        (r'(<h2>INTRODUCTION</h2>.*?</p>)', ('<h2>introduction</h2>', '</p>'), True),
+    )
+)
+
+
+def _find_literals(text: str, literals: tuple[str, ...]) -> int:
+    """End of the first match of literals[0].*?literals[1].*?... in text, or -1
+    
+    Taking the earliest occurrence of each literal in turn is exactly what the
+    lazy DOTALL regex finds, using str.find instead of backtracking.
+    """
+    pos = 0
+    for literal in literals:
+        pos = text.find(literal, pos)
+        if pos == -1:
+            return -1
+        pos += len(literal)
+    return pos
+
+# Static parts of the injected Five Elements block:
+# OPEN + svg + CAPTION + day master + MIDDLE + its element + SUFFIX
+_FIVE_ELEMENTS_OPEN = (
+    '\n<div class="five-elements-diagram" style="text-align: center; margin: 1.5rem auto; '
+    'padding: 1rem; max-width: 450px; background: linear-gradient(135deg, #fef9e7 0%, #fff8e1 100%); '
+    'border-radius: 12px; border: 1px solid #d4a574;">\n'
+)
+_FIVE_ELEMENTS_CAPTION = (
+    '\n<p style="color: #666; font-size: 0.85rem; margin-top: 0.8rem; font-style: italic;">\n'
+    '<strong style="color: #059669;">Green arrows</strong> = Generating Cycle (相生) • \n'
+    '<strong style="color: #dc2626;">Red dashed</strong> = Controlling Cycle (相克)\n'
+    '</p>\n'
+    '<p style="color: #8b4513; font-size: 0.95rem; margin-top: 0.4rem; font-weight: 600;">\n'
+    '🌊 Your Day Master: <strong>'
+)
+_FIVE_ELEMENTS_MIDDLE = '</strong> ('
+_FIVE_ELEMENTS_SUFFIX = ')\n</p>\n</div>\n'
+
+# WeasyPrint render options: the report embeds no raster images to optimize,
+# and presentational HTML attributes aren't used, so skip both passes.
+# Keep `word-break: break-all` out of the PDF CSS - it forces costly
+# min-width layout passes.
+_PDF_OPTIONS = {
+    'optimize_images': False,
+    'uncompressed_pdf': False,
+    'presentational_hints': False,
+}
+
+# File write buffer (coreutils' benchmarked sweet spot) and O_DIRECT block size
+_WRITE_BUFFER_SIZE = 128 * 1024
+_DIRECT_IO_BLOCK = 4096
+
+# Staging directories older than this were left behind by a crash
+_STALE_STAGING_SECONDS = 60 * 60
+
+# Report templates directory
+_TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
+
+
+def _minify_css(css: str) -> str:
+    """Strip comments and collapse whitespace to cut CSS tokenizer work"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    return re.sub(r'\s+', ' ', css).strip()
+
+
+# PDF stylesheet (Four Pillars + elemental colours), minified once at import
+_PDF_CSS_STRING = _minify_css(
+    (_TEMPLATE_DIR / "report_pdf.css").read_text(encoding='utf-8')
+)
+
+# Plain `{{ var }}` / `{{ var | safe }}` placeholders in a logic-free template
+_TEMPLATE_VAR_RE = re.compile(r'\{\{\s*(\w+)\s*(?:\|\s*safe\s*)?\}\}')
+
+# <title> of a rendered report (holds the person's name)
+_TITLE_RE = re.compile(r'<title>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+# Names Jinja2 reads as constants rather than context variables
+_JINJA_CONSTANTS = frozenset(('true', 'false', 'none', 'True', 'False', 'None'))
+
+
+class _TemplateContext(dict):
+    """format_map() context that renders unknown names as '' (like Jinja2's Undefined)"""
+    
+    def __missing__(self, key: str) -> str:
+        return ''
+
+
+def _compile_format_template(source: str) -> Optional[str]:
+    """Convert a logic-free Jinja2 template into a str.format_map() template
+    
+    Returns None when the template uses anything beyond plain variable
+    substitution (tags, comments, filters, expressions) - callers then
+    fall back to rendering with Jinja2.
+    """
+    if '{%' in source or '{#' in source:
+        return None
+    
+    # Jinja2 drops a single trailing newline by default
+    if source.endswith('\n'):
+        source = source[:-1]
+    
+    # split() alternates literal text and placeholder names
+    chunks = _TEMPLATE_VAR_RE.split(source)
+    literals = chunks[0::2]
+    if any('{{' in literal for literal in literals):
+        return None  # Expression Jinja2 has to evaluate
+    if any(not name.isidentifier() or name in _JINJA_CONSTANTS for name in chunks[1::2]):
+        return None  # Literal such as {{ 0 }} or {{ none }}
+    
+    chunks[0::2] = [literal.replace('{', '{{').replace('}', '}}') for literal in literals]
+    chunks[1::2] = ['{' + name + '}' for name in chunks[1::2]]
+    return ''.join(chunks)
+
+
+# report.html is a static shell with plain substitutions, so it can be
+# rendered with one str.format_map() call instead of a Jinja2 render
+_TEMPLATE_STR = _compile_format_template(
+    (_TEMPLATE_DIR / "report.html").read_text(encoding='utf-8')
+)
+
+def _write_direct(path: Path, data: bytes) -> None:
+    """Write bytes with O_DIRECT, bypassing the page cache
+    
+    O_DIRECT needs block-aligned buffers and lengths, so the data is copied
+    into a page-aligned mmap padded to a block multiple and the file is
+    truncated back to its real size afterwards.
+    """
+    size = len(data)
+    padded = max(-(-size // _DIRECT_IO_BLOCK), 1) * _DIRECT_IO_BLOCK
+    with mmap.mmap(-1, padded) as buf:
+        buf.write(data)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o644)
+        try:
+            with memoryview(buf) as view:
+                written = 0
+                while written < padded:
+                    written += os.write(fd, view[written:])
+            os.ftruncate(fd, size)
+        finally:
+            os.close(fd)
+
+
+# Remote responses kept by the caching URL fetcher (bounded to stay small),
+# shared by every thread's fetcher
+_URL_CACHE_MAX_ENTRIES = 64
+_url_responses: dict[str, tuple] = {}
+
+# One URL fetcher per thread (see _caching_url_fetcher)
+_url_fetchers = threading.local()
+
+
+@lru_cache(maxsize=1)
+def _caching_url_fetcher_class():
+    """WeasyPrint URLFetcher subclass that keeps remote responses in memory
+    
+    report.html links the Google Fonts stylesheet (and through it the font
+    files), which would otherwise be downloaded again for every PDF.
+    """
+    from weasyprint.urls import URLFetcher, URLFetcherResponse
+    
+    class CachingURLFetcher(URLFetcher):
+        def fetch(self, url, headers=None):
+            if not url.startswith(('http://', 'https://')):
+                return super().fetch(url, headers)
+            
+            cached = _url_responses.get(url)
+            if cached is not None:
+                # open() leaves the Request of a followed redirect in
+                # _request for the next fetch; drop it, or the next
+                # uncached URL would download (and cache) this one
+                self._request = None
+            else:
+                response = super().fetch(url, headers)
+                try:
+                    body = response.read()
+                finally:
+                    response.close()
+                cached = (response.url, body, response.headers, response.status)
+                if len(_url_responses) < _URL_CACHE_MAX_ENTRIES:
+                    _url_responses[url] = cached
+            return URLFetcherResponse(*cached)
+    
+    return CachingURLFetcher
+
+
+def _caching_url_fetcher():
+    """This thread's caching URL fetcher
+    
+    URLFetcher keeps per-request state on the instance (redirect handling),
+    so concurrent renders must not share one; the response cache is shared.
+    """
+    fetcher = getattr(_url_fetchers, 'fetcher', None)
+    if fetcher is None:
+        fetcher = _url_fetchers.fetcher = _caching_url_fetcher_class()()
+    return fetcher
+
+
+# Shared pool for PDF rendering (overlaps renders with file writes and batches).
+# WeasyPrint layout holds the GIL, so more threads add no parallelism - only
+# another font configuration and parsed stylesheet each (use
+# PDF_WORKER_PROCESSES for parallel renders)
+_PDF_THREADS = min(2, os.cpu_count() or 1)
+_pdf_pool = ThreadPoolExecutor(max_workers=_PDF_THREADS, thread_name_prefix="pdf-render")
+
+
+# Set in PDF worker processes, which must never start a pool of their own
+_in_pdf_worker = False
+
+# Guards replacing the process pool after a worker crash
+_pdf_process_pool_lock = threading.Lock()
+
+
+def _init_pdf_worker() -> None:
+    """Process pool initializer: load WeasyPrint, fonts and the PDF stylesheet once per worker"""
+    global _in_pdf_worker
+    _in_pdf_worker = True
+    report_generator.warm_up_pdf()
+
+
+def _pdf_worker_ready() -> None:
+    """No-op task: returns once its worker process has run the initializer"""
+
+
+def _save_pdf_in_worker(report_dir: Path, html_content: str) -> Path:
+    """Render one PDF inside a worker process (module-level so it can be pickled)"""
+    return report_generator._save_pdf(report_dir, html_content)
+
+
+@lru_cache(maxsize=1)
+def _pdf_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Worker processes for PDF rendering, or None when settings.PDF_WORKER_PROCESSES is 0
+    
+    WeasyPrint layout is CPU-bound and holds the GIL, so threads only overlap
+    a render with file I/O; separate processes render PDFs in parallel.
+    Workers are spawned (not forked) so they don't inherit the server's threads.
+    """
+    if settings.PDF_WORKER_PROCESSES <= 0 or _in_pdf_worker:
+        return None
+    return ProcessPoolExecutor(
+        max_workers=settings.PDF_WORKER_PROCESSES,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_pdf_worker
+    )
+
+
+def _replace_pdf_process_pool(broken_pool: ProcessPoolExecutor) -> Optional[ProcessPoolExecutor]:
+    """Swap a broken process pool (a worker died) for a fresh one
+    
+    Only the first caller for a given broken pool replaces it; later callers
+    get the pool that caller started.
+    """
+    with _pdf_process_pool_lock:
+        if _pdf_process_pool() is broken_pool:
+            _pdf_process_pool.cache_clear()
+            broken_pool.shutdown(wait=False)
+        return _pdf_process_pool()
+
+
 class ReportGeneratorError(Exception):
     """Custom exception for report generation errors"""
     pass
@@ -45,17 +382,18 @@ class ReportGenerator:
         result = generator.generate(bazi_data, markdown_content)
         # result = {
         #     "report_id": "abc-123",
-        #     "html_path": "/reports/abc-123/report.html",
-        #     "pdf_path": "/reports/abc-123/report.pdf"
+        #     "html_path": "/reports/ab/abc-123/report.html",
+        #     "pdf_path": "/reports/ab/abc-123/report.pdf"
         # }
     """
     
-    def __init__(self, base_dir: str = None):
+    def __init__(self, base_dir: Optional[str] = None, compress: bool = True):
         """
         Initialize report generator
         
         Args:
             base_dir: Base directory for storing reports (default: backend/reports)
+            compress: Store HTML/JSON zstd-compressed (served decompressed by /reports)
         """
         # Set reports directory
         self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent.parent / "reports"
@@ -63,64 +401,206 @@ class ReportGenerator:
         # Ensure reports directory exists
         self.base_dir.mkdir(parents=True, exist_ok=True)
         
-        # Setup Jinja2 template environment
-        template_dir = Path(__file__).parent.parent / "templates"
-        self.jinja_env = Environment(loader=FileSystemLoader(str(template_dir)))
+        # Reports are written here first, then renamed into place (same filesystem)
+        self._staging_dir = self.base_dir / ".staging"
+        self._staging_dir.mkdir(exist_ok=True)
+        self._remove_stale_staging()
+        
+        # Shard directories known to exist, so publishing skips the mkdir
+        self._shard_dirs: set[str] = set()
+        
+        # zstd compressors and WeasyPrint font configurations are not
+        # thread-safe, so each thread keeps its own
+        self.compress = compress
+        self._local = threading.local()
+        
+        # Five Elements diagram, read once and injected into every report
+        try:
+            svg_content = (_TEMPLATE_DIR / "five_elements_cycle.svg").read_text(encoding='utf-8')
+        except Exception:
+            svg_content = ""
+        self._svg_available = bool(svg_content)
+        self._five_elements_prefix = _FIVE_ELEMENTS_OPEN + svg_content + _FIVE_ELEMENTS_CAPTION
+    
+    @cached_property
+    def jinja_env(self) -> Environment:
+        """Jinja2 template environment (fallback when report.html has template logic)
+        
+        Built on first use: the plain report.html is rendered with
+        str.format_map and never needs it.
+        """
+        # Compiled template bytecode is cached on disk so it survives restarts
+        jinja_cache_dir = Path(tempfile.gettempdir()) / "bazi_jinja_cache"
+        jinja_cache_dir.mkdir(exist_ok=True)
+        return Environment(
+            loader=FileSystemLoader(str(_TEMPLATE_DIR)),
+            bytecode_cache=FileSystemBytecodeCache(str(jinja_cache_dir)),
+            auto_reload=False
+        )
+    
+    @cached_property
+    def _template(self) -> Template:
+        """Compiled report.html, looked up once and kept on the instance"""
+        return self.jinja_env.get_template("report.html")
+    
+    @property
+    def _font_config(self):
+        """This thread's WeasyPrint font configuration, so fonts are loaded once per thread
+        
+        Adding @font-face rules reconfigures fontconfig and the Pango font
+        map, which isn't safe while another render thread lays out with it.
+        """
+        font_config = getattr(self._local, 'font_config', None)
+        if font_config is None:
+            from weasyprint.text.fonts import FontConfiguration
+            
+            font_config = self._local.font_config = FontConfiguration()
+        return font_config
+    
+    @property
+    def _pdf_css(self):
+        """PDF stylesheet, parsed once per thread for its font configuration (WeasyPrint is imported lazily)"""
+        css = getattr(self._local, 'pdf_css', None)
+        if css is None:
+            from weasyprint import CSS
+            
+            css = self._local.pdf_css = CSS(string=_PDF_CSS_STRING, font_config=self._font_config)
+        return css
+    
+    def warm_up(self) -> None:
+        """Import WeasyPrint, parse the PDF stylesheet and start PDF workers ahead of the first report
+        
+        Called at app startup so the first request doesn't pay the cold-start cost.
+        Fonts and the stylesheet are per thread, so they are loaded on every
+        PDF render thread (worker processes load their own in the initializer).
+        """
+        # This process renders too: generate_batch() lays out in the caller
+        self.warm_up_pdf()
+        
+        process_pool = _pdf_process_pool()
+        if process_pool is not None:
+            # Spawned workers start lazily, one per submit(): queue one no-op
+            # per worker so all of them are started and initialized now
+            futures = [
+                process_pool.submit(_pdf_worker_ready)
+                for _ in range(settings.PDF_WORKER_PROCESSES)
+            ]
+            for future in futures:
+                future.result()
+        else:
+            # The barrier keeps each task busy until all have started, so
+            # every pool thread gets one
+            barrier = threading.Barrier(_PDF_THREADS)
+            futures = [
+                _pdf_pool.submit(self._warm_up_pdf_thread, barrier)
+                for _ in range(_PDF_THREADS)
+            ]
+            for future in futures:
+                future.result()
+    
+    def warm_up_pdf(self) -> None:
+        """Import WeasyPrint, load fonts and parse the PDF stylesheet for this thread (also run in PDF workers)"""
+        self._pdf_css
+    
+    def _warm_up_pdf_thread(self, barrier: threading.Barrier) -> None:
+        """warm_up() task run on each PDF render thread"""
+        try:
+            barrier.wait(timeout=10)
+        except threading.BrokenBarrierError:
+            pass  # Pool busy with real renders: warm up whichever thread this is
+        self.warm_up_pdf()
     
     def _generate_report_id(self) -> str:
-        """Generate unique report ID using UUID"""
-        return str(uuid.uuid4())[:8]  # Short UUID for cleaner URLs
+        """Generate unique report ID (8 random hex chars for cleaner URLs)
+        
+        32 bits of entropy - switch to secrets.token_urlsafe(6) (48 bits,
+        still 8 chars) if report volume ever makes collisions plausible.
+        """
+        return secrets.token_hex(4)
     
     def _create_report_directory(self, report_id: str) -> Path:
-        """Create directory for report files"""
-        report_dir = self.base_dir / report_id
-        report_dir.mkdir(parents=True, exist_ok=True)
-        return report_dir
+        """Create a staging directory for report files
+        
+        Files are written to base_dir/.staging and only published by
+        _publish_report_directory() once complete, so /reports never serves
+        a half-written report.
+        """
+        staging_dir = Path(tempfile.mkdtemp(prefix=f"{report_id}-", dir=self._staging_dir))
+        staging_dir.chmod(0o755)
+        return staging_dir
     
-    def _get_element_class(self, element: str) -> str:
-        """Map Chinese element to CSS class"""
-        element_map = {
-            '木': 'wood',
-            '火': 'fire',
-            '土': 'earth',
-            '金': 'metal',
-            '水': 'water',
-        }
-        return element_map.get(element, 'earth')
+    def _remove_stale_staging(self) -> None:
+        """Delete staging directories a crashed process never published or removed
+        
+        Only old ones go: other server processes share the staging directory
+        and may be writing reports right now.
+        """
+        cutoff = time.time() - _STALE_STAGING_SECONDS
+        with os.scandir(self._staging_dir) as entries:
+            for entry in entries:
+                try:
+                    if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                except FileNotFoundError:
+                    pass
     
-    def _get_stem_name(self, stem: str) -> str:
-        """Get romanized name for Heavenly Stem"""
-        stem_names = {
-            '甲': 'Jia', '乙': 'Yi', '丙': 'Bing', '丁': 'Ding', '戊': 'Wu',
-            '己': 'Ji', '庚': 'Geng', '辛': 'Xin', '壬': 'Ren', '癸': 'Gui'
-        }
-        return stem_names.get(stem, stem)
-    
-    def _get_branch_name(self, branch: str) -> str:
-        """Get romanized name + zodiac animal for Earthly Branch"""
-        branch_names = {
-            '子': 'Rat', '丑': 'Ox', '寅': 'Tiger', 
-            '卯': 'Rabbit', '辰': 'Dragon', '巳': 'Snake',
-            '午': 'Horse', '未': 'Goat', '申': 'Monkey',
-            '酉': 'Rooster', '戌': 'Dog', '亥': 'Pig'
-        }
-        return branch_names.get(branch, branch)
+    @staticmethod
+    def _discard_staging(staging_dirs: list[Path], pdf_futures: list["Future[Path]"]) -> None:
+        """Delete the staging directories of a failed generation
+        
+        Queued PDF renders are cancelled and running ones waited for first,
+        so nothing is still writing into a directory while it is removed.
+        """
+        for future in pdf_futures:
+            if not future.cancel():
+                future.exception()  # Superseded by the error being raised
+        for staging_dir in staging_dirs:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    
+    def _publish_report_directory(self, report_id: str, staging_dir: Path) -> Path:
+        """Atomically move a finished staging directory to its final location
+        
+        Reports are sharded by the first two characters of the ID so no
+        single directory grows without bound.
+        """
+        shard = report_id[:2]
+        report_dir = self.base_dir / shard / report_id
+        if shard not in self._shard_dirs:
+            self._make_shard_dir(report_dir.parent)
+            self._shard_dirs.add(shard)
+        try:
+            os.rename(staging_dir, report_dir)
+        except FileNotFoundError:
+            # Shard directory was removed behind our back (e.g. report cleanup)
+            self._make_shard_dir(report_dir.parent)
+            os.rename(staging_dir, report_dir)
+        return report_dir
     
-    def _extract_pillar_data(self, pillar: dict) -> dict:
+    @staticmethod
+    def _make_shard_dir(shard_dir: Path) -> None:
+        """Create a shard directory (one mkdir syscall, no stat beforehand)"""
+        try:
+            os.mkdir(shard_dir)
+        except FileExistsError:
+            pass
+    
+    def _extract_pillar_data(self, pillar: dict[str, Any]) -> dict[str, str]:
         """Extract stem and branch data from a pillar"""
         stem_data = pillar.get('天干', {})
         branch_data = pillar.get('地支', {})
         
         stem = stem_data.get('天干', '?')
         branch = branch_data.get('地支', '?')
+        stem_idx = _STEM_IDX.get(stem, -1)
+        branch_idx = _BRANCH_IDX.get(branch, -1)
         
         return {
             'stem': stem,
-            'stem_name': self._get_stem_name(stem),
-            'stem_element': self._get_element_class(stem_data.get('五行', '土')),
+            'stem_name': _STEM_NAMES[stem_idx] if stem_idx >= 0 else stem,
+            'stem_element': _ELEMENT_MAP.get(stem_data.get('五行', '土'), 'earth'),
             'branch': branch,
-            'branch_name': self._get_branch_name(branch),
-            'branch_element': self._get_element_class(branch_data.get('五行', '土')),
+            'branch_name': _BRANCH_NAMES[branch_idx] if branch_idx >= 0 else branch,
+            'branch_element': _ELEMENT_MAP.get(branch_data.get('五行', '土'), 'earth'),
         }
     
     def _get_day_master_element(self, day_master: str) -> str:
@@ -129,547 +609,254 @@ class ReportGenerator:
         Maps: 甲乙=Wood, 丙丁=Fire, 戊己=Earth, 庚辛=Metal, 壬癸=Water
         Returns: 'Water 水' format for use in caption
         """
-        element_map = {
-            '甲': 'Wood 木', '乙': 'Wood 木',
-            '丙': 'Fire 火', '丁': 'Fire 火',
-            '戊': 'Earth 土', '己': 'Earth 土',
-            '庚': 'Metal 金', '辛': 'Metal 金',
-            '壬': 'Water 水', '癸': 'Water 水'
-        }
-        return element_map.get(day_master, 'Unknown')
+        return _DAY_MASTER_ELEMENT.get(day_master, 'Unknown')
     
-    def _inject_five_elements_svg(self, html_content: str, day_master: str) -> str:
+    def _inject_five_elements_svg(self, html_content: str, day_master: str) -> tuple[str, str, str]:
         """Inject Five Elements SVG diagram into the Introduction section.
         
         CHANGE 4 FIX: The SVG must appear INSIDE the Introduction section,
         after the text 'The Five Elements (五行 Wu Xing)' as shown in image-1.png.
-        """
-        import re
         
-        # Load SVG from file
-        svg_path = Path(__file__).parent.parent / "templates" / "five_elements_cycle.svg"
-        try:
-            svg_content = svg_path.read_text(encoding='utf-8')
-        except Exception:
-            svg_content = ""
+        Returns (content before, diagram block, content after) for the
+        template to place side by side, instead of splicing a new string;
+        (html_content, '', '') when there is nowhere to put the diagram.
+        """
+        # Without the SVG there is no diagram to caption, so skip the search
+        if not self._svg_available:
+            return html_content, '', ''
         
         # Get Day Master element for caption
         day_master_element = self._get_day_master_element(day_master)
         
-        # Create the Five Elements block to inject
-        five_elements_block = f'''
-<div class="five-elements-diagram" style="text-align: center; margin: 1.5rem auto; padding: 1rem; max-width: 450px; background: linear-gradient(135deg, #fef9e7 0%, #fff8e1 100%); border-radius: 12px; border: 1px solid #d4a574;">
-{svg_content}
-<p style="color: #666; font-size: 0.85rem; margin-top: 0.8rem; font-style: italic;">
-<strong style="color: #059669;">Green arrows</strong> = Generating Cycle (相生) • 
-<strong style="color: #dc2626;">Red dashed</strong> = Controlling Cycle (相克)
-</p>
-<p style="color: #8b4513; font-size: 0.95rem; margin-top: 0.4rem; font-weight: 600;">
-🌊 Your Day Master: <strong>{day_master}</strong> ({day_master_element})
-</p>
-</div>
-'''
+        # Create the Five Elements block to inject (static parts prebuilt in __init__)
+        five_elements_block = (
+            self._five_elements_prefix + day_master
+            + _FIVE_ELEMENTS_MIDDLE + day_master_element + _FIVE_ELEMENTS_SUFFIX
+        )
         
         # Pattern to find the Wu Xing / Five Elements section and insert SVG after it
         # The AI-generated content has: <h3>Wu Xing - The Five Element Dance</h3>
         # followed by paragraphs about Generating and Controlling cycles
         # We want to insert the SVG AFTER the paragraph containing "Controlling Cycle"
         
-        patterns = [
-            # Pattern 1: After paragraph containing "Controlling Cycle" WITH inner tags allowed
-            r'(<p>.*?Controlling Cycle.*?相剋.*?</p>)',
-            # Pattern 2: After paragraph containing "相剋" (Chinese for controlling)
-            r'(<p>.*?相剋.*?</p>)',
-            # Pattern 3: After paragraph containing both cycle types
-            r'(<p>.*?Generating Cycle.*?Controlling Cycle.*?</p>)',
-            # Pattern 4: After any paragraph containing "Generating Cycle"
-            r'(<p>.*?Generating Cycle.*?</p>)',
-            # Pattern 5: After paragraph mentioning Wu Xing
-            r'(<p>.*?Wu Xing.*?</p>)',
-            # Pattern 6: After h3 containing "Wu Xing" followed by first paragraph
-            r'(<h3>.*?Wu Xing.*?</h3>\s*<p>.*?</p>)',
-            # Pattern 7: After any mention of Five Elements with closing tag
-            r'(<p>.*?Five Elements?.*?</p>)',
-            # Pattern 8: After h3 containing "INTRODUCTION" followed by content
-            r'(<h2>INTRODUCTION</h2>.*?</p>)',
-        ]
+        # Match with str.find on one lowercase copy instead of regex scans.
+        # 'İ'/'ı' match 'i' case-insensitively but don't lowercase to it ('İ'
+        # even lowercases to two characters), so fall back to the regexes.
+        lower_content = html_content.lower()
+        use_find = '\u0130' not in html_content and '\u0131' not in html_content
         
-        for pattern in patterns:
-            match = re.search(pattern, html_content, re.IGNORECASE | re.DOTALL)
-            if match:
-                # Insert the diagram after the matched content
+        for pattern, literals, exact in _WUXING_PATTERNS:
+            insert_pos = _find_literals(lower_content, literals) if use_find else 0
+            if insert_pos == -1:
+                continue
+            if not (use_find and exact):
+                match = pattern.search(html_content)
+                if not match:
+                    continue
                 insert_pos = match.end()
-                html_content = html_content[:insert_pos] + five_elements_block + html_content[insert_pos:]
-                break
+            
+            # Insert the diagram after the matched content
+            return html_content[:insert_pos], five_elements_block, html_content[insert_pos:]
         
-        return html_content
+        return html_content, '', ''
     
     def _convert_markdown_to_html(self, markdown_content: str) -> str:
-        """Convert Markdown to HTML"""
-        return markdown.markdown(
+        """Convert Markdown to HTML
+        
+        Uses cmark-gfm (C) with GitHub-flavoured tables; HARDBREAKS matches
+        the previous nl2br behaviour and UNSAFE keeps raw HTML from Claude.
+        """
+        import cmarkgfm
+        from cmarkgfm.cmark import Options
+        
+        return cmarkgfm.github_flavored_markdown_to_html(
             markdown_content,
-            extensions=['extra', 'nl2br', 'sane_lists', 'tables']
+            options=Options.CMARK_OPT_UNSAFE | Options.CMARK_OPT_HARDBREAKS
         )
     
     def _render_html_template(
         self, 
         bazi_data: dict, 
         html_content: str,
-        request_data: dict = None
+        request_data: Optional[dict] = None
     ) -> str:
         """Render the Jinja2 HTML template with all pillar data"""
-        template = self.jinja_env.get_template("report.html")
-        
-        # Extract pillar data
-        year_pillar = self._extract_pillar_data(bazi_data.get('年柱', {}))
-        month_pillar = self._extract_pillar_data(bazi_data.get('月柱', {}))
-        day_pillar = self._extract_pillar_data(bazi_data.get('日柱', {}))
-        hour_pillar = self._extract_pillar_data(bazi_data.get('时柱', {}))
-        
         # Extract name from location or use default
         location = request_data.get('location', 'Unknown') if request_data else 'Unknown'
         name = request_data.get('name', location.split(',')[0].strip()) if request_data else 'Your'
         
         # Extract birth year from birth_date
-        birth_date_raw = bazi_data.get('阳历', 'N/A')
+        birth_date_raw = str(bazi_data.get('阳历', 'N/A'))
         # CHANGE 2: Remove time from birth_date to avoid repetition
         # e.g., "1993年9月28日 13:55:00" -> "1993年9月28日"
-        birth_date_only = birth_date_raw.split(' ')[0] if ' ' in str(birth_date_raw) else birth_date_raw
-        birth_year = birth_date_raw.split('-')[0] if '-' in str(birth_date_raw) else birth_date_raw[:4] if len(str(birth_date_raw)) >= 4 else 'N/A'
+        birth_date_only = birth_date_raw.partition(' ')[0]
+        birth_year = birth_date_raw.partition('-')[0] if '-' in birth_date_raw else birth_date_raw[:4] if len(birth_date_raw) >= 4 else 'N/A'
         
         # CHANGE 4: Extract birth_day, birth_month, and format report_year
         # Chinese date format: "1993年9月28日" -> day=28, month=9
-        import re
         birth_day = 'N/A'
         birth_month = 'N/A'
         
-        # Try to parse Chinese date format (e.g., "1993年9月28日")
-        chinese_match = re.search(r'(\d+)年(\d+)月(\d+)日', str(birth_date_raw))
-        if chinese_match:
-            birth_month = chinese_match.group(2)  # e.g., "9"
-            birth_day = chinese_match.group(3)    # e.g., "28"
-        else:
-            # Try ISO format (e.g., "1993-09-28")
-            iso_match = re.search(r'(\d{4})-(\d{2})-(\d{2})', str(birth_date_raw))
-            if iso_match:
-                birth_month = str(int(iso_match.group(2)))  # Remove leading zero
-                birth_day = str(int(iso_match.group(3)))    # Remove leading zero
+        birth_match = _BIRTH_RE.match(birth_date_raw)
+        if birth_match:
+            if birth_match[1] is not None:
+                # Chinese date format (e.g., "1993年9月28日")
+                birth_month = birth_match[2]  # e.g., "9"
+                birth_day = birth_match[3]    # e.g., "28"
+            else:
+                # ISO format (e.g., "1993-09-28")
+                birth_month = str(int(birth_match[5]))  # Remove leading zero
+                birth_day = str(int(birth_match[6]))    # Remove leading zero
         
         # CHANGE 4: Format report_year as "Mmm-YYYY" (e.g., "Feb-2026")
         report_year = datetime.now().strftime("%b-%Y")  # e.g., "Feb-2026"
         
-        return template.render(
+        day_master = bazi_data.get('日主', '')
+        if request_data:
+            gender = request_data.get('gender', 'Male')
+            gender = _GENDER_CAP.get(gender) or gender.capitalize()
+        else:
+            gender = 'N/A'
+        
+        # CHANGE 4 FIX: Inject Five Elements SVG into content BEFORE template rendering
+        report_content, five_elements_diagram, report_content_rest = (
+            self._inject_five_elements_svg(html_content, day_master)
+        )
+        
+        context = {
             # Header info
-            name=name,
-            birth_date=birth_date_only,  # CHANGE 2: Date only, no time
-            birth_time=request_data.get('birth_time', 'N/A') if request_data else 'N/A',
-            location=location,
-            gender=request_data.get('gender', 'Male').capitalize() if request_data else 'N/A',
-            
-            # Year Pillar
-            year_stem=year_pillar['stem'],
-            year_stem_name=year_pillar['stem_name'],
-            year_stem_element=year_pillar['stem_element'],
-            year_branch=year_pillar['branch'],
-            year_branch_name=year_pillar['branch_name'],
-            year_branch_element=year_pillar['branch_element'],
-            birth_year=birth_year,
-            
-            # Month Pillar
-            month_stem=month_pillar['stem'],
-            month_stem_name=month_pillar['stem_name'],
-            month_stem_element=month_pillar['stem_element'],
-            month_branch=month_pillar['branch'],
-            month_branch_name=month_pillar['branch_name'],
-            month_branch_element=month_pillar['branch_element'],
-            
-            # Day Pillar
-            day_stem=day_pillar['stem'],
-            day_stem_name=day_pillar['stem_name'],
-            day_stem_element=day_pillar['stem_element'],
-            day_branch=day_pillar['branch'],
-            day_branch_name=day_pillar['branch_name'],
-            day_branch_element=day_pillar['branch_element'],
-            
-            # Hour Pillar
-            hour_stem=hour_pillar['stem'],
-            hour_stem_name=hour_pillar['stem_name'],
-            hour_stem_element=hour_pillar['stem_element'],
-            hour_branch=hour_pillar['branch'],
-            hour_branch_name=hour_pillar['branch_name'],
-            hour_branch_element=hour_pillar['branch_element'],
+            'name': name,
+            'birth_date': birth_date_only,  # CHANGE 2: Date only, no time
+            'birth_time': request_data.get('birth_time', 'N/A') if request_data else 'N/A',
+            'location': location,
+            'gender': gender,
+            'birth_year': birth_year,
             
             # Summary data
-            bazi_chars=bazi_data.get('八字', 'N/A'),
-            day_master=bazi_data.get('日主', 'N/A'),
-            zodiac=bazi_data.get('生肖', 'N/A'),
-            # CHANGE 4 FIX: Inject Five Elements SVG into content BEFORE template rendering
-            report_content=self._inject_five_elements_svg(html_content, bazi_data.get('日主', '')),
-            current_year=datetime.now().year,
+            'bazi_chars': bazi_data.get('八字', 'N/A'),
+            'day_master': bazi_data.get('日主', 'N/A'),
+            'zodiac': bazi_data.get('生肖', 'N/A'),
+            'report_content': report_content,
+            'five_elements_diagram': five_elements_diagram,
+            'report_content_rest': report_content_rest,
+            'current_year': datetime.now().year,
             
             # CHANGE 4: New header format variables
-            birth_day=birth_day,      # Just the day number (e.g., "28")
-            birth_month=birth_month,  # Just the month number (e.g., "9")
-            report_year=report_year,  # Formatted as "Feb-2026"
+            'birth_day': birth_day,      # Just the day number (e.g., "28")
+            'birth_month': birth_month,  # Just the month number (e.g., "9")
+            'report_year': report_year,  # Formatted as "Feb-2026"
             
             # Dynamic Five Elements caption
-            day_master_element=self._get_day_master_element(bazi_data.get('日主', ''))
-        )
+            'day_master_element': self._get_day_master_element(day_master),
+        }
+        
+        # Pillar data: year_stem, year_stem_name, ..., hour_branch_element
+        for prefix, pillar_key in _PILLARS:
+            for field, value in self._extract_pillar_data(bazi_data.get(pillar_key, {})).items():
+                context[f'{prefix}_{field}'] = value
+        
+        if _TEMPLATE_STR is not None:
+            return _TEMPLATE_STR.format_map(_TemplateContext(context))
+        return self._template.render(context)
+    
+    def _compress(self, data: bytes) -> bytes:
+        """Compress bytes with zstd level 1 (fast; disk savings outweigh the CPU)"""
+        cctx = getattr(self._local, 'zstd', None)
+        if cctx is None:
+            import zstandard
+            
+            cctx = self._local.zstd = zstandard.ZstdCompressor(level=1)
+        return cctx.compress(data)
+    
+    def _write_file(self, path: Path, data: bytes) -> Path:
+        """Write bytes to path, zstd-compressed to path + '.zst' when enabled"""
+        if self.compress:
+            path = path.with_name(path.name + ".zst")
+            data = self._compress(data)
+        with open(path, 'wb', buffering=_WRITE_BUFFER_SIZE) as f:
+            f.write(data)
+        return path
+    
+    def _write_pdf_file(self, pdf_path: Path, write_pdf: Callable[[Any], Any]) -> Path:
+        """Save a PDF produced by write_pdf(target)
+        
+        Uses O_DIRECT when settings.PDF_DIRECT_IO is on (PDFs are written
+        once and rarely read back), otherwise a 128 KiB buffered file.
+        """
+        if settings.PDF_DIRECT_IO and hasattr(os, 'O_DIRECT'):
+            data = write_pdf(None)
+            try:
+                _write_direct(pdf_path, data)
+            except OSError:
+                # Filesystem without O_DIRECT support (e.g. tmpfs)
+                with open(pdf_path, 'wb', buffering=_WRITE_BUFFER_SIZE) as f:
+                    f.write(data)
+            return pdf_path
+        
+        with open(pdf_path, 'wb', buffering=_WRITE_BUFFER_SIZE) as f:
+            write_pdf(f)
+        return pdf_path
     
     def _save_html(self, report_dir: Path, html_content: str) -> Path:
         """Save HTML to file"""
-        html_path = report_dir / "report.html"
-        html_path.write_text(html_content, encoding='utf-8')
-        return html_path
+        return self._write_file(report_dir / "report.html", html_content.encode('utf-8'))
     
     def _save_pdf(self, report_dir: Path, html_content: str) -> Path:
         """Convert HTML to PDF and save"""
-        pdf_path = report_dir / "report.pdf"
+        # WeasyPrint is imported lazily: it pulls in Pango/cairo and is slow to load
+        from weasyprint import HTML
         
-        # Comprehensive PDF CSS - Supports Four Pillars with Elemental Colors
-        pdf_css = CSS(string='''
-            /* Page Setup */
-            @page {
-                size: A4;
-                margin: 1.5cm 1.2cm;
-            }
-            
-            /* Reset and Base */
-            * {
-                margin: 0;
-                padding: 0;
-                box-sizing: border-box;
-            }
-            
-            body {
-                font-family: "Segoe UI", "Microsoft YaHei", Arial, sans-serif;
-                font-size: 10pt;
-                line-height: 1.7;
-                color: #1e293b;
-                background: white !important;
-            }
-            
-            /* Header Styling */
-            .report-header {
-                text-align: center;
-                padding: 25px 20px;
-                margin-bottom: 20px;
-                border-bottom: 3px solid #b48e3e;
-                background: #0f172a !important;
-                color: white;
-            }
-            
-            .header-logo {
-                font-size: 24pt;
-                display: block;
-                margin-bottom: 5px;
-            }
-            
-            .report-title {
-                font-size: 18pt;
-                color: #b48e3e;
-                margin-bottom: 5px;
-                text-transform: uppercase;
-                letter-spacing: 1px;
-            }
-            
-            .report-subtitle {
-                font-size: 10pt;
-                color: rgba(255,255,255,0.7);
-                font-style: italic;
-            }
-            
-            .report-meta {
-                font-size: 9pt;
-                color: rgba(255,255,255,0.6);
-                margin-top: 10px;
-            }
-            
-            /* Four Pillars Dashboard */
-            .bazi-dashboard {
-                background: #f8fafc !important;
-                border: 1px solid #b48e3e;
-                padding: 15px;
-                margin: 15px 10px 20px;
-                page-break-inside: avoid;
-            }
-            
-            .pillars-title {
-                text-align: center;
-                font-size: 12pt;
-                color: #0f172a;
-                margin-bottom: 15px;
-            }
-            
-            /* BaZi Table for PDF */
-            .bazi-table {
-                width: 100%;
-                max-width: 500px;
-                margin: 0 auto 15px;
-                border-collapse: collapse;
-            }
-            
-            .bazi-table th,
-            .bazi-table td {
-                padding: 8px 5px;
-                text-align: center;
-                border: 1px solid #e2e8f0;
-            }
-            
-            .header-row th {
-                background: #0f172a;
-                color: white;
-                font-size: 9pt;
-                font-weight: 600;
-            }
-            
-            .header-detail {
-                font-size: 7pt;
-                font-weight: 400;
-                opacity: 0.8;
-            }
-            
-            .label-cell {
-                background: #f8fafc;
-                font-size: 8pt;
-                font-weight: 700;
-                width: 50px;
-            }
-            
-            .label-chinese {
-                font-size: 6pt;
-                color: #475569;
-            }
-            
-            .element-cell {
-                background: white;
-            }
-            
-            .chinese-char {
-                font-size: 14pt;
-                font-weight: bold;
-            }
-            
-            .romanized {
-                font-size: 7pt;
-                color: #475569;
-            }
-            
-            /* Element cell backgrounds for PDF */
-            .element-cell.wood { color: #22c55e; background: #f0fdf4; }
-            .element-cell.fire { color: #ef4444; background: #fef2f2; }
-            .element-cell.earth { color: #d97706; background: #fffbeb; }
-            .element-cell.metal { color: #6b7280; background: #f9fafb; }
-            .element-cell.water { color: #3b82f6; background: #eff6ff; }
-            
-            /* Element Colors - CORRECT as per Manager */
-            .wood { color: #22c55e; }  /* Green */
-            .fire { color: #ef4444; }
-            .earth { color: #d97706; }  /* Orangey-Yellow */
-            .metal { color: #6b7280; }  /* Grey */
-            .water { color: #3b82f6; }
-            
-            .meta-grid {
-                display: flex;
-                justify-content: space-around;
-                border-top: 1px solid #e2e8f0;
-                padding-top: 15px;
-            }
-            
-            .meta-item {
-                text-align: center;
-            }
-            
-            .meta-label {
-                font-size: 7pt;
-                color: #475569;
-                text-transform: uppercase;
-                display: block;
-            }
-            
-            .meta-value {
-                font-size: 11pt;
-                color: #b48e3e;
-                font-weight: bold;
-            }
-            
-            /* Element Cycle Section */
-            .element-cycle {
-                text-align: center;
-                margin: 20px auto;
-                padding: 15px;
-                background: #f8fafc !important;
-                border: 1px solid #e2e8f0;
-                page-break-inside: avoid;
-            }
-            
-            .element-cycle-title {
-                font-size: 11pt;
-                color: #0f172a;
-                margin-bottom: 10px;
-            }
-            
-            .element-cycle svg {
-                max-width: 300px;
-                height: auto;
-            }
-            
-            /* Main Content */
-            .content-body {
-                padding: 10px 15px;
-            }
-            
-            /* Headings */
-            h1 {
-                font-size: 14pt;
-                color: #0f172a;
-                margin: 25px 0 12px;
-                padding-bottom: 8px;
-                border-bottom: 2px solid #b48e3e;
-                page-break-after: avoid;
-            }
-            
-            h2 {
-                font-size: 12pt;
-                color: #b48e3e;
-                margin: 18px 0 10px;
-                page-break-after: avoid;
-            }
-            
-            h3 {
-                font-size: 10pt;
-                color: #0f172a;
-                margin: 14px 0 8px;
-                font-weight: bold;
-                page-break-after: avoid;
-            }
-            
-            /* Paragraphs */
-            p {
-                margin: 8px 0;
-                text-align: justify;
-            }
-            
-            /* Text Emphasis */
-            strong { color: #0f172a; }
-            em { color: #b48e3e; font-style: italic; }
-            
-            /* Lists */
-            ul, ol {
-                margin: 8px 0 8px 20px;
-                padding: 0;
-            }
-            
-            li {
-                margin: 4px 0;
-                page-break-inside: avoid;
-            }
-            
-            /* Horizontal Rules */
-            hr {
-                border: none;
-                border-top: 1px solid #e2e8f0;
-                margin: 20px 0;
-            }
-            
-            /* Blockquotes */
-            blockquote {
-                background: #f8fafc;
-                border-left: 3px solid #b48e3e;
-                padding: 10px 15px;
-                margin: 12px 0;
-                font-style: italic;
-                page-break-inside: avoid;
-            }
-            
-            /* Tables */
-            table {
-                width: 100%;
-                border-collapse: collapse;
-                margin: 15px 0;
-                font-size: 9pt;
-            }
-            
-            thead {
-                background: #0f172a !important;
-                color: white;
-            }
-            
-            th {
-                padding: 8px 10px;
-                text-align: left;
-                font-weight: 600;
-                font-size: 8pt;
-            }
-            
-            td {
-                padding: 6px 10px;
-                border-bottom: 1px solid #e2e8f0;
-            }
-            
-            tbody tr:nth-child(even) {
-                background: #f8fafc;
-            }
-            
-            /* Footer */
-            .report-footer {
-                text-align: center;
-                font-size: 8pt;
-                color: #475569;
-                margin-top: 25px;
-                padding: 15px;
-                border-top: 1px solid #e2e8f0;
-                background: #f8fafc !important;
-            }
-            
-            /* Page break controls */
-            .bazi-dashboard, .element-cycle, blockquote {
-                page-break-inside: avoid;
-            }
-            
-            /* Tables can break across pages but rows shouldn't split */
-            table {
-                page-break-inside: auto;
-            }
-            
-            thead {
-                display: table-header-group;
-            }
-            
-            tr {
-                page-break-inside: avoid;
-                page-break-after: auto;
-            }
-            
-            h1, h2, h3 {
-                page-break-after: avoid;
-            }
-            
-            /* Keep h2 with following content together */
-            h2 {
-                page-break-before: auto;
-            }
-        ''')
+        pdf_path = report_dir / "report.pdf"
         
-        # Generate PDF
-        HTML(string=html_content).write_pdf(pdf_path, stylesheets=[pdf_css])
+        # Lay out with the cached stylesheet, then serialize the Document
+        # (kept as separate steps so the layout can be inspected or reused)
+        document = HTML(
+            string=html_content,
+            base_url=str(report_dir),
+            url_fetcher=_caching_url_fetcher()
+        ).render(
+            stylesheets=[self._pdf_css],
+            font_config=self._font_config,
+            **_PDF_OPTIONS
+        )
+        return self._write_pdf_file(pdf_path, partial(document.write_pdf, **_PDF_OPTIONS))
+    
+    def _submit_pdf(self, report_dir: Path, html_content: str) -> "Future[Path]":
+        """Start rendering a PDF in the background (worker processes if configured)"""
+        process_pool = _pdf_process_pool()
+        if process_pool is not None:
+            try:
+                return process_pool.submit(_save_pdf_in_worker, report_dir, html_content)
+            except BrokenProcessPool:
+                process_pool = _replace_pdf_process_pool(process_pool)
+                if process_pool is not None:
+                    return process_pool.submit(_save_pdf_in_worker, report_dir, html_content)
+        return _pdf_pool.submit(self._save_pdf, report_dir, html_content)
+    
+    def _pdf_result(self, future: "Future[Path]", report_dir: Path, html_content: str) -> Path:
+        """Wait for a PDF started by _submit_pdf()
         
-        return pdf_path
+        If a worker process died (WeasyPrint crash, OOM kill) it takes the
+        whole pool down, so the PDF is rendered once more on a fresh pool.
+        """
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            return self._submit_pdf(report_dir, html_content).result()
     
     def _save_data(self, report_dir: Path, bazi_data: dict) -> Path:
         """Save raw BaZi data as JSON (for debugging/future use)"""
-        data_path = report_dir / "data.json"
-        data_path.write_text(
-            json.dumps(bazi_data, ensure_ascii=False, indent=2),
-            encoding='utf-8'
-        )
-        return data_path
+        if orjson is not None:
+            data = orjson.dumps(bazi_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        else:
+            data = json.dumps(bazi_data, ensure_ascii=False, indent=2).encode('utf-8')
+        return self._write_file(report_dir / "data.json", data)
     
     def generate(
         self, 
         bazi_data: dict, 
         markdown_content: str,
-        request_data: dict = None
+        request_data: Optional[dict] = None
     ) -> dict:
         """
         Generate complete report (HTML + PDF)
@@ -681,12 +868,14 @@ class ReportGenerator:
         Returns:
             dict with report_id and file paths
         """
+        staging_dir = None
+        pdf_future = None
         try:
             # Generate unique ID
             report_id = self._generate_report_id()
             
-            # Create report directory
-            report_dir = self._create_report_directory(report_id)
+            # Create staging directory
+            staging_dir = self._create_report_directory(report_id)
             
             # Convert Markdown → HTML
             content_html = self._convert_markdown_to_html(markdown_content)
@@ -694,25 +883,209 @@ class ReportGenerator:
             # Render full HTML template (pass request_data for name, gender, etc.)
             full_html = self._render_html_template(bazi_data, content_html, request_data)
             
+            # Render PDF in the background while the HTML and JSON are written
+            pdf_future = self._submit_pdf(staging_dir, full_html)
+            
             # Save HTML file
-            html_path = self._save_html(report_dir, full_html)
+            html_path = self._save_html(staging_dir, full_html)
             
-            # Save PDF file
-            pdf_path = self._save_pdf(report_dir, full_html)
+            # Save raw data (optional, for debugging)
+            if settings.SAVE_RAW_DATA:
+                self._save_data(staging_dir, bazi_data)
             
-            # Save raw data (optional)
-            self._save_data(report_dir, bazi_data)
+            # Wait for PDF file, then publish the complete report
+            pdf_path = self._pdf_result(pdf_future, staging_dir, full_html)
+            report_dir = self._publish_report_directory(report_id, staging_dir)
             
-            return {
-                "report_id": report_id,
-                "html_path": f"/reports/{report_id}/report.html",
-                "pdf_path": f"/reports/{report_id}/report.pdf",
-                "html_file": str(html_path),
-                "pdf_file": str(pdf_path)
-            }
+            return self._build_result(report_id, report_dir, html_path, pdf_path)
             
         except Exception as e:
+            if staging_dir is not None:
+                self._discard_staging([staging_dir], [pdf_future] if pdf_future else [])
             raise ReportGeneratorError(f"Failed to generate report: {str(e)}")
+    
+    def generate_many(self, items: list[tuple]) -> list[dict]:
+        """
+        Generate several reports in one call (HTML + PDF)
+        
+        Per-report setup is shared across the batch: all directories are
+        created up front, each render thread reuses its cached PDF stylesheet,
+        and the PDF renders run concurrently on the shared PDF pool (or
+        worker processes).
+        
+        Args:
+            items: (bazi_data, markdown_content) tuples, optionally with
+                   request_data as a third element
+            
+        Returns:
+            list of result dicts, in the same order as items
+        """
+        report_ids = [self._generate_report_id() for _ in items]
+        staging_dirs: list[Path] = []
+        futures: list[Future[Path]] = []
+        try:
+            html_paths, full_htmls = self._prepare_batch(items, report_ids, staging_dirs)
+            
+            # Fan all PDF renders out to the pool (stylesheet is parsed once per thread)
+            for staging_dir, full_html in zip(staging_dirs, full_htmls):
+                futures.append(self._submit_pdf(staging_dir, full_html))
+            pdf_paths = [
+                self._pdf_result(future, staging_dir, full_html)
+                for future, staging_dir, full_html in zip(futures, staging_dirs, full_htmls)
+            ]
+            
+            return self._publish_batch(report_ids, staging_dirs, html_paths, pdf_paths)
+            
+        except Exception as e:
+            self._discard_staging(staging_dirs, futures)
+            raise ReportGeneratorError(f"Failed to generate reports: {str(e)}")
+    
+    def generate_batch(self, items: list[tuple]) -> list[dict]:
+        """
+        Generate several reports with a single WeasyPrint render
+        
+        All reports are laid out as one combined document (each starting on
+        a new page), so WeasyPrint's per-render fixed costs - CSS matching,
+        font loading, image decoding - are paid once. The rendered pages are
+        then split back into one PDF per report.
+        
+        Args:
+            items: same as generate_many()
+            
+        Returns:
+            list of result dicts, in the same order as items
+        """
+        # Nothing to lay out (matches generate_many([]))
+        if not items:
+            return []
+        
+        report_ids = [self._generate_report_id() for _ in items]
+        staging_dirs: list[Path] = []
+        try:
+            html_paths, full_htmls = self._prepare_batch(items, report_ids, staging_dirs)
+            pdf_paths = self._save_pdf_batch(staging_dirs, full_htmls)
+            
+            return self._publish_batch(report_ids, staging_dirs, html_paths, pdf_paths)
+            
+        except Exception as e:
+            self._discard_staging(staging_dirs, [])
+            raise ReportGeneratorError(f"Failed to generate reports: {str(e)}")
+    
+    def _prepare_batch(
+        self, items: list[tuple], report_ids: list[str], staging_dirs: list[Path]
+    ) -> tuple[list[Path], list[str]]:
+        """Create directories, render and save HTML/JSON for a batch of reports
+        
+        Staging directories are appended to staging_dirs as they are created,
+        so the caller can clean them up if anything fails.
+        
+        Returns:
+            (html_paths, full_htmls) lists
+        """
+        # Create all staging directories up front
+        for report_id in report_ids:
+            staging_dirs.append(self._create_report_directory(report_id))
+        
+        # Render and save all HTML files (cheap, done serially)
+        html_paths = []
+        full_htmls = []
+        for report_dir, (bazi_data, markdown_content, *rest) in zip(staging_dirs, items):
+            request_data = rest[0] if rest else None
+            content_html = self._convert_markdown_to_html(markdown_content)
+            full_html = self._render_html_template(bazi_data, content_html, request_data)
+            html_paths.append(self._save_html(report_dir, full_html))
+            if settings.SAVE_RAW_DATA:
+                self._save_data(report_dir, bazi_data)
+            full_htmls.append(full_html)
+        
+        return html_paths, full_htmls
+    
+    def _publish_batch(
+        self,
+        report_ids: list[str],
+        staging_dirs: list[Path],
+        html_paths: list[Path],
+        pdf_paths: list[Path]
+    ) -> list[dict]:
+        """Publish every finished report of a batch and build the result dicts"""
+        return [
+            self._build_result(
+                report_id,
+                self._publish_report_directory(report_id, staging_dir),
+                html_path,
+                pdf_path
+            )
+            for report_id, staging_dir, html_path, pdf_path
+            in zip(report_ids, staging_dirs, html_paths, pdf_paths)
+        ]
+    
+    def _save_pdf_batch(self, report_dirs: list[Path], full_htmls: list[str]) -> list[Path]:
+        """Render several reports in one WeasyPrint pass and save one PDF each"""
+        from weasyprint import HTML
+        
+        # Reports' <head>s differ only in the <title> (set per PDF below), so
+        # keep the first one and stack the <body> contents, each marked with
+        # an anchor on a new page
+        head_end = full_htmls[0].find('>', full_htmls[0].find('<body')) + 1
+        parts = [full_htmls[0][:head_end]]
+        for i, full_html in enumerate(full_htmls):
+            body_start = full_html.find('>', full_html.find('<body')) + 1
+            body_end = full_html.rfind('</body>')
+            page_break = 'page-break-before: always' if i else ''
+            parts.append(f'<div id="batch-report-{i}" style="{page_break}">')
+            parts.append(full_html[body_start:body_end])
+            parts.append('</div>')
+        parts.append('</body></html>')
+        
+        document = HTML(
+            string=''.join(parts),
+            base_url=str(report_dirs[0]),
+            url_fetcher=_caching_url_fetcher()
+        ).render(stylesheets=[self._pdf_css], font_config=self._font_config, **_PDF_OPTIONS)
+        
+        # Find the first page of each report from its anchor
+        starts = []
+        for i in range(len(full_htmls)):
+            anchor = f"batch-report-{i}"
+            starts.append(next(
+                page_number for page_number, page in enumerate(document.pages)
+                if anchor in page.anchors
+            ))
+        ends = starts[1:] + [len(document.pages)]
+        
+        # Split the pages into one PDF per report. Written one after another:
+        # the copies share the laid-out pages and fonts of one Document,
+        # which isn't safe to draw from several threads at once
+        pdf_paths = [report_dir / "report.pdf" for report_dir in report_dirs]
+        for start, end, pdf_path, full_html in zip(starts, ends, pdf_paths, full_htmls):
+            report_document = document.copy(document.pages[start:end])
+            
+            # copy() shares the combined document's metadata, whose title is
+            # the first report's; each PDF gets its own report's title
+            report_document.metadata = copy.copy(document.metadata)
+            title_match = _TITLE_RE.search(full_html)
+            report_document.metadata.title = unescape(title_match[1]) if title_match else None
+            
+            self._write_pdf_file(pdf_path, partial(report_document.write_pdf, **_PDF_OPTIONS))
+        
+        return pdf_paths
+    
+    def _build_result(
+        self, report_id: str, report_dir: Path, html_path: Path, pdf_path: Path
+    ) -> dict:
+        """Build the public result dict for a published report
+        
+        html_path/pdf_path were written in the staging directory, so only
+        their names are kept and joined onto the published report_dir.
+        """
+        url_prefix = f"/reports/{report_id[:2]}/{report_id}"
+        return {
+            "report_id": report_id,
+            "html_path": f"{url_prefix}/report.html",
+            "pdf_path": f"{url_prefix}/report.pdf",
+            "html_file": str(report_dir / html_path.name),
+            "pdf_file": str(report_dir / pdf_path.name)
+        }
 
 
 # Singleton instance
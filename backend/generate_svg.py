@@ -1,16 +1,22 @@
+import gzip
+import io
 import math
+import os
+import re
+import sys
+from functools import lru_cache
 
-def get_point(cx, cy, r, angle_deg):
-    rad = math.radians(angle_deg)
-    return cx + r * math.cos(rad), cy + r * math.sin(rad)
+def get_point(cx, cy, r, angle_deg, _radians=math.radians, _cos=math.cos, _sin=math.sin):
+    # math functions bound as defaults: local lookups instead of module attributes
+    rad = _radians(angle_deg)
+    return cx + r * _cos(rad), cy + r * _sin(rad)
 
-elements = {
-    'Wood': (80, 170),
-    'Fire': (200, 55),
-    'Earth': (320, 170),
-    'Metal': (265, 315),
-    'Water': (135, 315)
-}
+# Element centres as parallel tuples, indexed by the constants below
+ELEMENT_NAMES = ('Wood', 'Fire', 'Earth', 'Metal', 'Water')
+ELEMENT_X = (80, 200, 320, 265, 135)
+ELEMENT_Y = (170, 55, 170, 315, 315)
+WOOD, FIRE, EARTH, METAL, WATER = range(5)
+NAME_TO_IDX = {name: i for i, name in enumerate(ELEMENT_NAMES)}
 
 CENTER = (200, 195)
 ARC_RADIUS = 135  # Radius of the ring of arrows
@@ -19,96 +25,103 @@ ARC_RADIUS = 135  # Radius of the ring of arrows
 svg_header = """<!-- Five Elements (Wu Xing) Cycle Diagram -->
 <!-- Shows both Generating Cycle (outer arrows) and Controlling Cycle (inner star) -->
 <!-- Arrowheads are inline polygons (PDF-safe, no marker-end dependency) -->
-<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 400 410" width="400" height="410">
-  <defs>
-    <!-- Gradients for each element -->
-    <radialGradient id="woodGrad" cx="50%" cy="50%" r="50%">
-      <stop offset="0%" style="stop-color:#4ade80"/>
-      <stop offset="100%" style="stop-color:#16a34a"/>
-    </radialGradient>
-    <radialGradient id="fireGrad" cx="50%" cy="50%" r="50%">
-      <stop offset="0%" style="stop-color:#f87171"/>
-      <stop offset="100%" style="stop-color:#dc2626"/>
-    </radialGradient>
-    <radialGradient id="earthGrad" cx="50%" cy="50%" r="50%">
-      <stop offset="0%" style="stop-color:#fbbf24"/>
-      <stop offset="100%" style="stop-color:#d97706"/>
-    </radialGradient>
-    <radialGradient id="metalGrad" cx="50%" cy="50%" r="50%">
-      <stop offset="0%" style="stop-color:#e5e7eb"/>
-      <stop offset="100%" style="stop-color:#9ca3af"/>
-    </radialGradient>
-    <radialGradient id="waterGrad" cx="50%" cy="50%" r="50%">
-      <stop offset="0%" style="stop-color:#60a5fa"/>
-      <stop offset="100%" style="stop-color:#2563eb"/>
-    </radialGradient>
-  </defs>
-  
-  <!-- Background circle -->
-  <circle cx="200" cy="195" r="175" fill="#fef9e7" stroke="#d4a574" stroke-width="2"/>
+<!-- Coordinates are in tenths of a pixel: the viewBox is 10x the width/height -->
+<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 4000 4100" width="400" height="410">
+<defs>
+<!-- Gradients for each element -->
+<radialGradient id="woodGrad"><stop offset="0%" stop-color="#4ade80"/><stop offset="100%" stop-color="#16a34a"/></radialGradient>
+<radialGradient id="fireGrad"><stop offset="0%" stop-color="#f87171"/><stop offset="100%" stop-color="#dc2626"/></radialGradient>
+<radialGradient id="earthGrad"><stop offset="0%" stop-color="#fbbf24"/><stop offset="100%" stop-color="#d97706"/></radialGradient>
+<radialGradient id="metalGrad"><stop offset="0%" stop-color="#e5e7eb"/><stop offset="100%" stop-color="#9ca3af"/></radialGradient>
+<radialGradient id="waterGrad"><stop offset="0%" stop-color="#60a5fa"/><stop offset="100%" stop-color="#2563eb"/></radialGradient>
+</defs>
+
+<!-- Background circle -->
+<circle cx="2000" cy="1950" r="1750" fill="#fef9e7" stroke="#d4a574" stroke-width="20"/>
 """
 
-svg_footer = """  <!-- Element Circles -->
-  <!-- Wood (East - Upper Left) -->
-  <circle cx="80" cy="170" r="40" fill="url(#woodGrad)" stroke="#166534" stroke-width="2"/>
-  <text x="80" y="163" text-anchor="middle" fill="white" font-size="20" font-weight="bold">木</text>
-  <text x="80" y="183" text-anchor="middle" fill="white" font-size="11">Wood</text>
-  
-  <!-- Fire (South - Top) -->
-  <circle cx="200" cy="55" r="40" fill="url(#fireGrad)" stroke="#991b1b" stroke-width="2"/>
-  <text x="200" y="48" text-anchor="middle" fill="white" font-size="20" font-weight="bold">火</text>
-  <text x="200" y="68" text-anchor="middle" fill="white" font-size="11">Fire</text>
-  
-  <!-- Earth (Center - Upper Right) -->
-  <circle cx="320" cy="170" r="40" fill="url(#earthGrad)" stroke="#92400e" stroke-width="2"/>
-  <text x="320" y="163" text-anchor="middle" fill="white" font-size="20" font-weight="bold">土</text>
-  <text x="320" y="183" text-anchor="middle" fill="white" font-size="11">Earth</text>
-  
-  <!-- Metal (West - Lower Right) -->
-  <circle cx="265" cy="315" r="40" fill="url(#metalGrad)" stroke="#4b5563" stroke-width="2"/>
-  <text x="265" y="308" text-anchor="middle" fill="#374151" font-size="20" font-weight="bold">金</text>
-  <text x="265" y="328" text-anchor="middle" fill="#374151" font-size="11">Metal</text>
-  
-  <!-- Water (North - Lower Left) -->
-  <circle cx="135" cy="315" r="40" fill="url(#waterGrad)" stroke="#1e40af" stroke-width="2"/>
-  <text x="135" y="308" text-anchor="middle" fill="white" font-size="20" font-weight="bold">水</text>
-  <text x="135" y="328" text-anchor="middle" fill="white" font-size="11">Water</text>
-  
-  <!-- Legend - Centered, wider box, smaller font -->
-  <rect x="85" y="375" width="230" height="26" rx="5" fill="white" stroke="#d4a574" stroke-width="1"/>
-  <line x1="100" y1="388" x2="125" y2="388" stroke="#059669" stroke-width="3"/>
-  <polygon points="126,384 132,388 126,392" fill="#059669"/>
-  <text x="137" y="392" fill="#059669" font-size="9" font-weight="600">Generating</text>
-  <line x1="210" y1="388" x2="235" y2="388" stroke="#dc2626" stroke-width="2" stroke-dasharray="5,3"/>
-  <polygon points="236,384 242,388 236,392" fill="#dc2626"/>
-  <text x="247" y="392" fill="#dc2626" font-size="9" font-weight="600">Controlling</text>
+svg_footer = """<!-- Element Circles -->
+<!-- Wood (East - Upper Left) -->
+<circle cx="800" cy="1700" r="400" fill="url(#woodGrad)" stroke="#166534" stroke-width="20"/>
+<text x="800" y="1630" text-anchor="middle" fill="white" font-size="200" font-weight="bold">木</text>
+<text x="800" y="1830" text-anchor="middle" fill="white" font-size="110">Wood</text>
+
+<!-- Fire (South - Top) -->
+<circle cx="2000" cy="550" r="400" fill="url(#fireGrad)" stroke="#991b1b" stroke-width="20"/>
+<text x="2000" y="480" text-anchor="middle" fill="white" font-size="200" font-weight="bold">火</text>
+<text x="2000" y="680" text-anchor="middle" fill="white" font-size="110">Fire</text>
+
+<!-- Earth (Center - Upper Right) -->
+<circle cx="3200" cy="1700" r="400" fill="url(#earthGrad)" stroke="#92400e" stroke-width="20"/>
+<text x="3200" y="1630" text-anchor="middle" fill="white" font-size="200" font-weight="bold">土</text>
+<text x="3200" y="1830" text-anchor="middle" fill="white" font-size="110">Earth</text>
+
+<!-- Metal (West - Lower Right) -->
+<circle cx="2650" cy="3150" r="400" fill="url(#metalGrad)" stroke="#4b5563" stroke-width="20"/>
+<text x="2650" y="3080" text-anchor="middle" fill="#374151" font-size="200" font-weight="bold">金</text>
+<text x="2650" y="3280" text-anchor="middle" fill="#374151" font-size="110">Metal</text>
+
+<!-- Water (North - Lower Left) -->
+<circle cx="1350" cy="3150" r="400" fill="url(#waterGrad)" stroke="#1e40af" stroke-width="20"/>
+<text x="1350" y="3080" text-anchor="middle" fill="white" font-size="200" font-weight="bold">水</text>
+<text x="1350" y="3280" text-anchor="middle" fill="white" font-size="110">Water</text>
+
+<!-- Legend - Centered, wider box, smaller font -->
+<rect x="850" y="3750" width="2300" height="260" rx="50" fill="white" stroke="#d4a574" stroke-width="10"/>
+<line x1="1000" y1="3880" x2="1250" y2="3880" stroke="#059669" stroke-width="30"/>
+<polygon points="1260,3840 1320,3880 1260,3920" fill="#059669"/>
+<text x="1370" y="3920" fill="#059669" font-size="90" font-weight="600">Generating</text>
+<line x1="2100" y1="3880" x2="2350" y2="3880" stroke="#dc2626" stroke-width="20" stroke-dasharray="50,30"/>
+<polygon points="2360,3840 2420,3880 2360,3920" fill="#dc2626"/>
+<text x="2470" y="3920" fill="#dc2626" font-size="90" font-weight="600">Controlling</text>
 </svg>
 """
 
-def make_arrow(x2, y2, angle_rad, color):
+# Output is assembled as bytes; the fixed parts are encoded once here
+_HEADER_B = svg_header.encode('utf-8')
+_FOOTER_B = svg_footer.encode('utf-8')
+
+def c10(x):
+    # Coordinate in the 10x viewBox: integer text, no float formatting,
+    # and the same 0.1px precision the diagram always had
+    return b'%d' % round(x * 10)
+
+# Fixed element templates: each is filled with a tuple of c10() values
+_ARC_TMPL = b'<path d="M %s %s A ' + b'%d %d' % (ARC_RADIUS * 10, ARC_RADIUS * 10) + b' 0 0 1 %s %s" fill="none" stroke="#059669" stroke-width="30"/>\n'
+_LINE_TMPL = b'<line x1="%s" y1="%s" x2="%s" y2="%s" stroke="#dc2626" stroke-width="20" stroke-dasharray="50,30"/>\n'
+_ARROW_TMPL = b'<polygon points="%s,%s %s,%s %s,%s" fill="%s"/>\n'
+
+def arrow_points(x2, y2, sin_a, cos_a):
     # Expanded Size for Visibility
     # Tip at x2,y2
     # Base is back 16px
+    # sin_a/cos_a: sin and cos of the arrow direction (precomputed)
     base_len = 16
     width = 12 
+    half_width = width * 0.5
     
     # Base center
-    bx = x2 - base_len * math.cos(angle_rad)
-    by = y2 - base_len * math.sin(angle_rad)
+    bx = x2 - base_len * cos_a
+    by = y2 - base_len * sin_a
     
     # Left and Right of base
     # Perpendicular vector (-sin, cos) -> Normal to direction
-    lx = bx + width/2 * math.sin(angle_rad)
-    ly = by - width/2 * math.cos(angle_rad)
+    lx = bx + half_width * sin_a
+    ly = by - half_width * cos_a
     
-    rx = bx - width/2 * math.sin(angle_rad)
-    ry = by + width/2 * math.cos(angle_rad)
+    rx = bx - half_width * sin_a
+    ry = by + half_width * cos_a
     
-    return f'<polygon points="{x2:.1f},{y2:.1f} {lx:.1f},{ly:.1f} {rx:.1f},{ry:.1f}" fill="{color}"/>'
+    return c10(x2), c10(y2), c10(lx), c10(ly), c10(rx), c10(ry)
 
-content = [svg_header]
-content.append('  <!-- Generating Cycle Arrows (Outer - Green) -->')
-content.append('  <!-- Paths are segments of a circle centered at (200, 195) -->')
+# ===========================================
+# Arrow geometry
+# ===========================================
+# Element positions are constants, so every arrow is computed once into
+# GENERATING_ARROWS / CONTROLLING_ARROWS:
+# (start x, start y, end x, end y, sin, cos of the arrow direction)
+# and formatted once into GENERATING_SVG / CONTROLLING_SVG:
+# (path/line template values, polygon template values)
 
 # Logic for Arcs:
 # Center C=(200,195). Radius R_arc=135.
@@ -117,21 +130,18 @@ content.append('  <!-- Paths are segments of a circle centered at (200, 195) -->
 # EndPoint: Intersection of Element B Circle (r=42) and Path Circle (R=135).
 # Tangent at EndPoint: Perpendicular to radius vector (End - C).
 
-generating_pairs = [
-    ('Wood', 'Fire'),
-    ('Fire', 'Earth'),
-    ('Earth', 'Metal'),
-    ('Metal', 'Water'),
-    ('Water', 'Wood')
-]
-
-for start_name, end_name in generating_pairs:
-    e1 = elements[start_name]
-    e2 = elements[end_name]
-    
+generating_pairs = (
+    (WOOD, FIRE),
+    (FIRE, EARTH),
+    (EARTH, METAL),
+    (METAL, WATER),
+    (WATER, WOOD)
+)
+
+def generating_arrow(i1, i2):
     # Calculate angles of elements relative to Center
-    ang1 = math.atan2(e1[1]-CENTER[1], e1[0]-CENTER[0])
-    ang2 = math.atan2(e2[1]-CENTER[1], e2[0]-CENTER[0])
+    ang1 = math.atan2(ELEMENT_Y[i1]-CENTER[1], ELEMENT_X[i1]-CENTER[0])
+    ang2 = math.atan2(ELEMENT_Y[i2]-CENTER[1], ELEMENT_X[i2]-CENTER[0])
     
     # Normalize angles to 0-2pi for sorting? No, atan2 is -pi to pi.
     # We want clockwise flow. Wood->Fire etc.
@@ -191,68 +201,139 @@ for start_name, end_name in generating_pairs:
     sx = CENTER[0] + ARC_RADIUS * math.cos(s_arc)
     sy = CENTER[1] + ARC_RADIUS * math.sin(s_arc)
     
-    ex = CENTER[0] + ARC_RADIUS * math.cos(e_arc)
-    ey = CENTER[1] + ARC_RADIUS * math.sin(e_arc)
-    
-    # Draw Arc
-    # Large arc flag: usually 0 for adjacent elements (angle < pi).
-    # Sweep flag: 1 for clockwise (positive angle direction in SVG with y-down? 
-    # WAIT. Standard math (y up): angle increases CCW.
-    # SVG (y down): angle increases CW.
-    # 0 deg (1,0). 90 deg (0,1).
-    # cos(0)=1, sin(0)=0. cos(90)=0, sin(90)=1.
-    # (0,1) is DOWN in SVG.
-    # So SVG angles increase CLOCKWISE.
-    # My atan2 calc used y-CENTER[1]. 
-    # If y increases down, then atan2 reflects standard SVG angles.
-    # So increase angle = Clockwise.
-    # So Sweep Flag = 1.
-    
-    content.append(f'  <path d="M {sx:.1f} {sy:.1f} A {ARC_RADIUS} {ARC_RADIUS} 0 0 1 {ex:.1f} {ey:.1f}" fill="none" stroke="#059669" stroke-width="3"/>')
+    cos_e = math.cos(e_arc)
+    sin_e = math.sin(e_arc)
+    ex = CENTER[0] + ARC_RADIUS * cos_e
+    ey = CENTER[1] + ARC_RADIUS * sin_e
     
     # Tangent Angle at End (for Arrow)
     # For a circle, tangent is perpendicular to radius.
     # Radius vector at End: (ex-cx, ey-cy). Angle = e_arc.
     # Tangent vector (CW): angle + 90 deg (pi/2).
-    t_ang = e_arc + math.pi/2
-    
-    content.append('  ' + make_arrow(ex, ey, t_ang, '#059669'))
+    # sin(e + pi/2) = cos(e), cos(e + pi/2) = -sin(e): no extra trig needed
+    return sx, sy, ex, ey, cos_e, -sin_e
+
+
+GENERATING_ARROWS = tuple(generating_arrow(a, b) for a, b in generating_pairs)
+GENERATING_SVG = tuple(
+    ((c10(sx), c10(sy), c10(ex), c10(ey)), arrow_points(ex, ey, sin_t, cos_t) + (b'#059669',))
+    for sx, sy, ex, ey, sin_t, cos_t in GENERATING_ARROWS
+)
 
 
 # Controlling Arrows (Straight Lines)
-content.append('\n  <!-- Controlling Arrows (Inner Star - Red) -->')
-ctrl_paths = [
-    ('Wood', 'Earth'),
-    ('Earth', 'Water'),
-    ('Water', 'Fire'),
-    ('Fire', 'Metal'),
-    ('Metal', 'Wood')
-]
-
-for start, end in ctrl_paths:
-    p1 = elements[start]
-    p2 = elements[end]
-    dx = p2[0] - p1[0]
-    dy = p2[1] - p1[1]
-    angle = math.atan2(dy, dx)
+ctrl_paths = (
+    (WOOD, EARTH),
+    (EARTH, WATER),
+    (WATER, FIRE),
+    (FIRE, METAL),
+    (METAL, WOOD)
+)
+
+def controlling_arrow(i1, i2):
+    x1 = ELEMENT_X[i1]
+    y1 = ELEMENT_Y[i1]
+    x2 = ELEMENT_X[i2]
+    y2 = ELEMENT_Y[i2]
+    dx = x2 - x1
+    dy = y2 - y1
+    # Unit direction vector: the same (cos, sin) as atan2 + cos/sin, without trig
+    inv_len = 1.0 / math.hypot(dx, dy)
+    cos_a = dx * inv_len
+    sin_a = dy * inv_len
     
     # Exact boundary r=42
     r_start = 42
     r_end = 42
     
     # Start point
-    sx = p1[0] + r_start * math.cos(angle)
-    sy = p1[1] + r_start * math.sin(angle)
+    sx = x1 + r_start * cos_a
+    sy = y1 + r_start * sin_a
     
     # End point
-    ex = p2[0] - r_end * math.cos(angle)
-    ey = p2[1] - r_end * math.sin(angle)
+    ex = x2 - r_end * cos_a
+    ey = y2 - r_end * sin_a
+    
+    return sx, sy, ex, ey, sin_a, cos_a
+
+
+CONTROLLING_ARROWS = tuple(controlling_arrow(a, b) for a, b in ctrl_paths)
+CONTROLLING_SVG = tuple(
+    ((c10(sx), c10(sy), c10(ex), c10(ey)), arrow_points(ex, ey, sin_a, cos_a) + (b'#dc2626',))
+    for sx, sy, ex, ey, sin_a, cos_a in CONTROLLING_ARROWS
+)
+
+
+# ===========================================
+# SVG output
+# ===========================================
+OUTPUT_PATH = 'app/templates/five_elements_cycle.svg'
+
+# The SVG is inlined into every report, so by default it is written
+# minified: no comments and no whitespace between tags
+MINIFY = True
+
+_COMMENT_RE = re.compile(rb'<!--.*?-->', re.DOTALL)
+_TAG_GAP_RE = re.compile(rb'>\s+<')
+
+def minify(svg):
+    svg = _COMMENT_RE.sub(b'', svg)
+    return _TAG_GAP_RE.sub(b'><', svg).strip() + b'\n'
+
+@lru_cache(maxsize=1)
+def build_svg():
+    # Inputs are all constants, so the markup is built once per process
+    # Written straight into one buffer (no fragment list + join)
+    buf = io.BytesIO()
+    buf.write(_HEADER_B)
+    buf.write(b'\n')
+    buf.write(b'<!-- Generating Cycle Arrows (Outer - Green) -->\n')
+    buf.write(b'<!-- Paths are segments of a circle centered at (2000, 1950) -->\n')
+
+    for arc, arrow in GENERATING_SVG:
+        # Draw Arc
+        # Large arc flag: usually 0 for adjacent elements (angle < pi).
+        # Sweep flag: 1 for clockwise (positive angle direction in SVG with y-down? 
+        # WAIT. Standard math (y up): angle increases CCW.
+        # SVG (y down): angle increases CW.
+        # 0 deg (1,0). 90 deg (0,1).
+        # cos(0)=1, sin(0)=0. cos(90)=0, sin(90)=1.
+        # (0,1) is DOWN in SVG.
+        # So SVG angles increase CLOCKWISE.
+        # My atan2 calc used y-CENTER[1]. 
+        # If y increases down, then atan2 reflects standard SVG angles.
+        # So increase angle = Clockwise.
+        # So Sweep Flag = 1.
     
-    # Line
-    content.append(f'  <line x1="{sx:.1f}" y1="{sy:.1f}" x2="{ex:.1f}" y2="{ey:.1f}" stroke="#dc2626" stroke-width="2" stroke-dasharray="5,3"/>')
-    content.append('  ' + make_arrow(ex, ey, angle, '#dc2626'))
+        buf.write(_ARC_TMPL % arc)
+        buf.write(_ARROW_TMPL % arrow)
+
+    buf.write(b'\n<!-- Controlling Arrows (Inner Star - Red) -->\n')
+    for line, arrow in CONTROLLING_SVG:
+        # Line
+        buf.write(_LINE_TMPL % line)
+        buf.write(_ARROW_TMPL % arrow)
+
+    buf.write(_FOOTER_B)
+    return buf.getvalue()
 
-content.append(svg_footer)
+def generate(path=OUTPUT_PATH, minified=MINIFY, svgz=False):
+    svg = build_svg()
+    if minified:
+        svg = minify(svg)
+    # Write a sibling temp file and swap it in, so readers never see a
+    # truncated SVG
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(svg)
+    os.replace(tmp, path)
+    if svgz:
+        # Pre-compressed copy (.svgz) for serving with Content-Encoding: gzip
+        with gzip.open(tmp, 'wb', compresslevel=9) as f:
+            f.write(svg)
+        os.replace(tmp, path + 'z')
+    return svg
 
-with open('app/templates/five_elements_cycle.svg', 'w', encoding='utf-8') as f:
-    f.write('\n'.join(content))
+if __name__ == "__main__":
+    # --pretty: keep comments and line breaks; --svgz: also write a gzipped copy
+    generate(minified='--pretty' not in sys.argv, svgz='--svgz' in sys.argv)
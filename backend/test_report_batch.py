@@ -0,0 +1,65 @@
+"""
+Test script for batch PDF generation
+====================================
+Renders two reports with generate_batch() and checks that each PDF carries
+its own report's title (the <title> holds the person's name), not the first
+report's. Run from backend/: python test_report_batch.py
+"""
+
+import re
+import tempfile
+import zlib
+
+from app.services.report_generator import ReportGenerator
+
+NAMES = ("Alice", "Bob")
+
+MARKDOWN = "## INTRODUCTION\n\nThe Five Elements (五行 Wu Xing) shape this chart."
+
+# Compressed PDF objects live in Flate streams
+STREAM_RE = re.compile(rb'stream\r?\n(.*?)\r?\nendstream', re.DOTALL)
+TITLE_RE = re.compile(rb'/Title\s*(<[0-9a-fA-F]*>|\((?:\\.|[^\\)])*\))')
+
+def pdf_title(data):
+    """/Title of a PDF's info dictionary, searched in raw and inflated streams"""
+    chunks = [data]
+    for stream in STREAM_RE.findall(data):
+        try:
+            chunks.append(zlib.decompress(stream))
+        except zlib.error:
+            pass
+    for chunk in chunks:
+        match = TITLE_RE.search(chunk)
+        if match:
+            value = match[1]
+            if value.startswith(b'<'):
+                raw = bytes.fromhex(value[1:-1].decode())
+                return raw[2:].decode('utf-16-be') if raw.startswith(b'\xfe\xff') else raw.decode('latin-1')
+            return re.sub(rb'\\(.)', rb'\1', value[1:-1]).decode('latin-1')
+    return None
+
+def test_batch_pdf_titles():
+    """Each report in a batch gets a PDF titled with its own name"""
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError) as e:
+        print(f"⏭️  Skipped: WeasyPrint not available ({e})")
+        return
+
+    generator = ReportGenerator(base_dir=tempfile.mkdtemp(), compress=False)
+    items = [
+        ({"日主": "甲"}, MARKDOWN, {"name": name, "gender": "male"})
+        for name in NAMES
+    ]
+    results = generator.generate_batch(items)
+
+    for name, result in zip(NAMES, results):
+        with open(result["pdf_file"], "rb") as f:
+            title = pdf_title(f.read())
+        assert title == f"🔮 {name}'s BaZi Destiny Report", (name, title)
+        print(f"✅ {result['pdf_path']}: {title}")
+
+if __name__ == "__main__":
+    print("Testing batch PDF titles...")
+    print("-" * 50)
+    test_batch_pdf_titles()
@@ -5,42 +5,73 @@ This script tests the MCP server API to verify it's working correctly.
 """
 
 import json
-import urllib.request
-import urllib.error
+import http.client
+from urllib.parse import urlsplit
+
+# orjson (Rust) works on bytes directly; stdlib json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
 
 # New REST API endpoint (much simpler than MCP protocol)
 API_URL = "http://localhost:3000/api/bazi"
 
-def test_mcp_server():
-    """Test the MCP server with a sample BaZi request"""
-    
-    # Simple REST API request
-    request_data = {
-        "solarDatetime": "1990-05-15T14:30:00+05:00",  # Sample: May 15, 1990, 2:30 PM PKT
-        "gender": 1  # Male
-    }
-    
+# Simple REST API request
+REQUEST_DATA = {
+    "solarDatetime": "1990-05-15T14:30:00+05:00",  # Sample: May 15, 1990, 2:30 PM PKT
+    "gender": 1  # Male
+}
+
+# The payload never changes, so it is encoded once
+REQUEST_BODY = orjson.dumps(REQUEST_DATA) if orjson else json.dumps(REQUEST_DATA).encode('utf-8')
+REQUEST_HEADERS = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+
+def connect():
+    """Open a connection to the API server (reusable across requests via keep-alive)"""
+    url = urlsplit(API_URL)
+    return http.client.HTTPConnection(url.hostname, url.port or 80, timeout=10)
+
+def run_request(conn=None):
+    """Send the sample BaZi request and print the response
+
+    Pass an open connection (from connect()) to reuse it across calls
+    instead of paying a TCP handshake per request.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = connect()
+
     try:
-        # Create request
-        req = urllib.request.Request(
-            API_URL,
-            data=json.dumps(request_data).encode('utf-8'),
-            headers={'Content-Type': 'application/json'}
-        )
-        
         # Send request
-        with urllib.request.urlopen(req, timeout=10) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            print("✅ MCP Server Response:")
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-            return result
-            
-    except urllib.error.URLError as e:
+        conn.request("POST", urlsplit(API_URL).path, body=REQUEST_BODY, headers=REQUEST_HEADERS)
+        response = conn.getresponse()
+        body = response.read()
+
+        if response.status >= 400:
+            print(f"❌ Connection Error: HTTP {response.status} {response.reason}")
+            return None
+
+        result = orjson.loads(body) if orjson else json.loads(body.decode('utf-8'))
+        print("✅ MCP Server Response:")
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return result
+
+    except (OSError, http.client.HTTPException) as e:
+        # Drop the broken connection so the next request reconnects
+        conn.close()
         print(f"❌ Connection Error: {e}")
         return None
     except Exception as e:
         print(f"❌ Error: {e}")
         return None
+    finally:
+        if own_conn:
+            conn.close()
+
+def test_mcp_server():
+    """Test the MCP server with a sample BaZi request"""
+    return run_request()
 
 if __name__ == "__main__":
     print("Testing BaZi MCP Server...")